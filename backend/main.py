@@ -2,17 +2,33 @@
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
-from pytz import timezone
+from typing import List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone as dt_timezone
+import asyncio
+import httpx
+import numpy as np
+from numba import njit
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import json
+import orjson
+import openpyxl
 import xlsxwriter
 from collections import defaultdict
-import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+import io
+import logging
 import os
+import time
+import zipfile
+
+# Диагностика через logging: %-аргументы форматируются только если уровень
+# включен, в отличие от print с f-строками в горячих циклах
+logging.basicConfig(level=os.environ.get("WSI_LOG_LEVEL", "INFO"))
+logger = logging.getLogger("wsi")
 
 app = FastAPI(title="Work Scripts Interface API")
 
@@ -27,9 +43,26 @@ app.add_middleware(
 
 # === Настройки ===
 TEAMSTORM_BASE_URL = "https://storm.alabuga.space"
-MOSCOW_TZ = timezone("Europe/Moscow")
+# Фиксированное смещение МСК = UTC+3 (постоянно с 2014 года): стдлиб-tzinfo
+# без медленных localize/astimezone из pytz
+MOSCOW_TZ = dt_timezone(timedelta(hours=3), "MSK")
+MSK_DELTA = timedelta(hours=3)
+MSK_OFFSET = np.timedelta64(3, "h")
 WORK_START_HOUR = 8
 WORK_END_HOUR = 17
+HISTORY_FETCH_CONCURRENCY = 32
+
+# Общая сессия с пулом соединений: TCP+TLS-хендшейк оплачивается один раз,
+# дальше запросы к TeamStorm идут по keep-alive
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    ),
+)
 
 # === Pydantic модели ===
 class Period(BaseModel):
@@ -44,7 +77,25 @@ class ProcessRequest(BaseModel):
 
 # === Вспомогательные функции (из оригинального скрипта) ===
 def parse_iso_to_msk(dt_str: str) -> datetime:
-    """Парсит ISO-дату из истории (с 'Z') и переводит в МСК (timezone-aware)."""
+    """Парсит ISO-дату из истории (с 'Z') и переводит в МСК (timezone-aware).
+
+    Обычный формат TeamStorm "YYYY-MM-DDTHH:MM:SS[.ffffff]Z" разбирается
+    срезами с фиксированным смещением +3 — без pytz-astimezone; остальные
+    форматы идут через fromisoformat.
+    """
+    if dt_str.endswith("Z"):
+        try:
+            micro = 0
+            if len(dt_str) > 20 and dt_str[19] == ".":
+                micro = int(dt_str[20:-1].ljust(6, "0")[:6])
+            utc_naive = datetime(
+                int(dt_str[:4]), int(dt_str[5:7]), int(dt_str[8:10]),
+                int(dt_str[11:13]), int(dt_str[14:16]), int(dt_str[17:19]),
+                micro,
+            )
+            return (utc_naive + MSK_DELTA).replace(tzinfo=MOSCOW_TZ)
+        except ValueError:
+            pass
     return datetime.fromisoformat(dt_str.replace("Z", "+00:00")).astimezone(MOSCOW_TZ)
 
 def clamp_to_workday_window(dt: datetime) -> datetime:
@@ -61,143 +112,272 @@ def is_working_day(d: datetime) -> bool:
     """Пн–Пт → True; Сб(5), Вс(6) → False"""
     return d.weekday() not in (5, 6)
 
+WORKDAY_SECONDS = (WORK_END_HOUR - WORK_START_HOUR) * 3600
+WORKDAY_US = WORKDAY_SECONDS * 1_000_000
+WORK_START_US = WORK_START_HOUR * 3600 * 1_000_000
+WORK_END_US = WORK_END_HOUR * 3600 * 1_000_000
+US_PER_DAY = 86_400 * 1_000_000
+
+def _us_of_day(dt: datetime) -> int:
+    """Время суток в микросекундах (без создания новых datetime)."""
+    return ((dt.hour * 3600 + dt.minute * 60 + dt.second) * 1_000_000) + dt.microsecond
+
+def _business_days_upto(ordinal: int) -> int:
+    """Количество рабочих дней (Пн–Пт) среди дней с ординалами [1, ordinal].
+    Ординал 1 (0001-01-01) — понедельник, поэтому неполная неделя в конце
+    всегда начинается с понедельника."""
+    return (ordinal // 7) * 5 + min(ordinal % 7, 5)
+
 def add_working_time_segment(start_dt: datetime, end_dt: datetime) -> timedelta:
     """
     Возвращает длительность пересечения [start_dt, end_dt] с рабочими окнами
     (Пн–Пт, 08:00–17:00 МСК).
+
+    Полные рабочие дни считаются закрытой формулой по ординалам дат,
+    без итерации по дням — O(1) независимо от длины отрезка.
     """
     if end_dt <= start_dt:
         return timedelta(0)
-    
-    total = timedelta(0)
-    cur = start_dt
-    
-    # Итерация по дням
-    while cur.date() <= end_dt.date():
-        if not is_working_day(cur):
-            # Перепрыгиваем на следующий рабочий день к 08:00
-            cur = (cur + timedelta(days=1)).replace(hour=WORK_START_HOUR, minute=0, second=0, microsecond=0)
-            continue
-        
-        day_start = cur.replace(hour=WORK_START_HOUR, minute=0, second=0, microsecond=0)
-        day_end = cur.replace(hour=WORK_END_HOUR, minute=0, second=0, microsecond=0)
-        
-        # Отрезок дня, который нам нужен
-        seg_start = max(cur, day_start)
-        seg_end = min(end_dt, day_end)
-        
-        if seg_start < seg_end:
-            total += (seg_end - seg_start)
-        
-        # Переходим на следующий день, к 08:00
-        cur = (cur + timedelta(days=1)).replace(hour=WORK_START_HOUR, minute=0, second=0, microsecond=0)
-    
+
+    o1 = start_dt.toordinal()
+    o2 = end_dt.toordinal()
+
+    # Границы рабочего окна в микросекундах суток — чистые int-сравнения,
+    # новые datetime-объекты не создаются вовсе
+    start_us = min(max(_us_of_day(start_dt), WORK_START_US), WORK_END_US)
+    end_us = min(max(_us_of_day(end_dt), WORK_START_US), WORK_END_US)
+
+    # Отрезок внутри одного дня
+    if o1 == o2:
+        if not is_working_day(start_dt):
+            return timedelta(0)
+        return timedelta(microseconds=max(end_us - start_us, 0))
+
+    total_us = 0
+
+    # Частичный первый день: от start_dt до 17:00
+    if is_working_day(start_dt):
+        total_us += WORK_END_US - start_us
+
+    # Частичный последний день: от 08:00 до end_dt
+    if is_working_day(end_dt):
+        total_us += end_us - WORK_START_US
+
+    # Полные рабочие дни строго между первым и последним
+    full_days = _business_days_upto(o2 - 1) - _business_days_upto(o1)
+    if full_days > 0:
+        total_us += full_days * WORKDAY_SECONDS * 1_000_000
+
+    return timedelta(microseconds=total_us)
+
+# === JIT-ядро подсчета времени в статусе ===
+# Те же формулы, что в add_working_time_segment, но на int64-микросекундах
+# от эпохи (наивное МСК), чтобы Numba компилировала цикл без Python-объектов.
+# День эпохи 0 (1970-01-01) — четверг; +4 выравнивает на понедельник == 1 mod 7.
+
+@njit(cache=True)
+def _bdays_upto(ordinal: int) -> int:
+    return (ordinal // 7) * 5 + min(ordinal % 7, 5)
+
+@njit(cache=True)
+def _working_us(a: int, b: int) -> int:
+    if b <= a:
+        return 0
+
+    d1 = a // US_PER_DAY
+    d2 = b // US_PER_DAY
+    w1 = (d1 + 3) % 7
+    w2 = (d2 + 3) % 7
+    start_us = min(max(a % US_PER_DAY, WORK_START_US), WORK_END_US)
+    end_us = min(max(b % US_PER_DAY, WORK_START_US), WORK_END_US)
+
+    if d1 == d2:
+        if w1 >= 5:
+            return 0
+        return max(end_us - start_us, 0)
+
+    total = 0
+    if w1 < 5:
+        total += WORK_END_US - start_us
+    if w2 < 5:
+        total += end_us - WORK_START_US
+
+    full_days = _bdays_upto(d2 + 3) - _bdays_upto(d1 + 4)
+    if full_days > 0:
+        total += full_days * WORKDAY_US
+
     return total
 
-def calculate_in_progress_time_for_period(
-    history: List[Dict[str, Any]],
-    period_start_str: str,
-    period_end_str: str,
-    status_name: str = "in progress"
+@njit(cache=True)
+def _accumulate_us(ts_i64, codes, start_i64, end_i64, target_code) -> int:
+    state_idx = np.searchsorted(ts_i64, start_i64, side="right") - 1
+    end_idx = np.searchsorted(ts_i64, end_i64, side="right")
+
+    in_target = state_idx >= 0 and codes[state_idx] == target_code
+    last = start_i64
+    total = 0
+
+    for i in range(state_idx + 1, end_idx):
+        t = ts_i64[i]
+        if in_target:
+            total += _working_us(last, t)
+        in_target = codes[i] == target_code
+        last = t
+
+    if in_target and last < end_i64:
+        total += _working_us(last, end_i64)
+
+    return total
+
+def build_events(history: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """
+    Разбирает историю один раз: парсит даты, нормализует статусы (lowercase)
+    и сортирует по времени. Статусы кодируются целыми числами, чтобы
+    сравнение в горячем цикле было int-сравнением, а не строковым.
+
+    Возвращает (timestamps: datetime64[us] в наивном МСК,
+    status_codes: int32, status_ids: статус → код).
+    """
+    status_ids: Dict[str, int] = {}
+    date_strs: List[str] = []
+    codes_list: List[int] = []
+    for e in history:
+        # data/newValue бывают null в обычных ответах API — такое событие
+        # просто пропускаем, не роняя разбор всей истории
+        new_status = (((e.get("data") or {}).get("newValue") or {}).get("statusName") or "").lower()
+        if not e.get("date") or not new_status:
+            continue
+        date_strs.append(e["date"])
+        codes_list.append(status_ids.setdefault(new_status, len(status_ids)))
+
+    try:
+        # Даты TeamStorm — UTC с суффиксом 'Z': парсим все одним C-циклом
+        # и переводим в МСК прибавлением константного смещения
+        ts = np.array([d.rstrip("Z") for d in date_strs], dtype="datetime64[us]") + MSK_OFFSET
+    except ValueError:
+        # Нестандартный формат даты — медленный путь по одному событию
+        ts_list: List[datetime] = []
+        ok_codes: List[int] = []
+        for d, code in zip(date_strs, codes_list):
+            try:
+                ts_list.append(parse_iso_to_msk(d).replace(tzinfo=None))
+                ok_codes.append(code)
+            except Exception as ex:
+                logger.debug("Ошибка при парсинге события истории: %s", ex)
+        ts = np.array(ts_list, dtype="datetime64[us]")
+        codes_list = ok_codes
+
+    codes = np.array(codes_list, dtype=np.int32)
+    order = np.argsort(ts, kind="stable")
+    return ts[order], codes[order], status_ids
+
+def parse_period(period: Period) -> Tuple[datetime, datetime]:
+    """Границы периода как наивные МСК-datetime: [00:00 начала, 23:59:59 конца]."""
+    period_start = datetime.strptime(period.start, "%Y-%m-%d")
+    period_end = datetime.strptime(period.end, "%Y-%m-%d").replace(
+        hour=23, minute=59, second=59
+    )
+    return period_start, period_end
+
+def time_in_status(
+    timestamps: np.ndarray,
+    status_codes: np.ndarray,
+    status_ids: Dict[str, int],
+    period_start: datetime,
+    period_end: datetime,
+    target_status: str
 ) -> float:
     """
     Вычисляет время (в минутах) в указанном статусе ТОЛЬКО внутри заданного периода,
-    учитывая рабочие часы и исключая выходные.
-    
+    учитывая рабочие часы и исключая выходные. Все времена — наивные МСК.
+
     Args:
-        history: История изменений статусов
-        period_start_str: Начало периода (YYYY-MM-DD)
-        period_end_str: Конец периода (YYYY-MM-DD)
-        status_name: Название статуса для подсчета (по умолчанию "in progress")
+        timestamps: Отсортированные моменты смены статуса (из build_events)
+        status_codes: Параллельный массив кодов статусов
+        status_ids: Отображение статус → код (из build_events)
+        period_start: Начало периода (из parse_period)
+        period_end: Конец периода (из parse_period)
+        target_status: Название статуса для подсчета (lowercase)
     """
-    # Нормализуем статус для сравнения (lowercase)
-    target_status = status_name.lower()
-    
-    # Период в МСК
-    period_start = datetime.strptime(period_start_str, "%Y-%m-%d").replace(
-        tzinfo=MOSCOW_TZ, hour=0, minute=0, second=0, microsecond=0
-    )
-    period_end = datetime.strptime(period_end_str, "%Y-%m-%d").replace(
-        tzinfo=MOSCOW_TZ, hour=23, minute=59, second=59, microsecond=0
-    )
-    
-    # История по времени (вся), статус меняется в entry['data']['newValue']['statusName']
-    events = []
-    for e in history:
-        try:
-            new_status = (e.get("data", {}).get("newValue", {}).get("statusName") or "").lower()
-            if not e.get("date") or not new_status:
-                continue
-            events.append((parse_iso_to_msk(e["date"]), new_status))
-        except Exception as ex:
-            print(f"Ошибка при парсинге события истории: {ex}")
-            continue
-    
-    if not events:
-        print(f"Нет событий в истории для периода {period_start_str} - {period_end_str}")
+    # Код -1 не встречается в status_codes: статус вне истории даст 0 минут
+    target_code = status_ids.get(target_status, -1)
+
+    if timestamps.size == 0:
+        logger.debug("Нет событий в истории для периода %s - %s", period_start.date(), period_end.date())
         return 0.0
-    
-    events.sort(key=lambda x: x[0])
-    
-    # Логируем найденные статусы для отладки
-    unique_statuses = set(status for _, status in events)
-    print(f"Найденные статусы в истории: {unique_statuses}")
-    print(f"Ищем статус: '{target_status}'")
-    
-    # Определяем состояние на момент period_start
-    in_target_status = False
-    for dt, status in events:
-        if dt <= period_start:
-            in_target_status = (status == target_status)
-        else:
-            break
-    
-    # Бежим по событиям в пределах до period_end
-    last_ts = period_start
-    total_td = timedelta(0)
-    
-    for dt, status in events:
-        if dt <= period_start:
-            continue
-        
-        if dt > period_end:
-            if in_target_status:
-                total_td += add_working_time_segment(last_ts, period_end)
-            break
-        
-        # От last_ts до dt — состояние инвариантное
-        if in_target_status:
-            total_td += add_working_time_segment(last_ts, dt)
-        
-        # Обновляем состояние и маркер времени
-        in_target_status = (status == target_status)
-        last_ts = dt
-    else:
-        # Если цикл завершился без break и период не закрыт событиями
-        if last_ts < period_end and in_target_status:
-            total_td += add_working_time_segment(last_ts, period_end)
-    
-    minutes = total_td.total_seconds() / 60
-    print(f"Подсчитано минут в статусе '{target_status}': {minutes:.2f}")
+
+    # Весь обход — в скомпилированном ядре на int64-микросекундах
+    start_i64 = np.datetime64(period_start, "us").astype(np.int64)
+    end_i64 = np.datetime64(period_end, "us").astype(np.int64)
+    total_us = _accumulate_us(
+        timestamps.view(np.int64), status_codes, start_i64, end_i64, target_code
+    )
+
+    minutes = total_us / 60_000_000
+    logger.debug("Подсчитано минут в статусе '%s': %.2f", target_status, minutes)
     return minutes
 
+def _aggregate_item(
+    args: Tuple[Any, Any, str, List[Dict[str, Any]], List[Tuple[str, str, datetime, datetime]], str]
+) -> List[Tuple[str, str, str, Any, Any, float]]:
+    """
+    Обсчитывает одну задачу по всем периодам. Выполняется в worker-процессе:
+    задачи независимы, поэтому CPU-часть масштабируется по ядрам, а результаты
+    сливаются в родительском процессе.
+
+    Возвращает плоские строки (period_start, period_end, display_name,
+    key, task_name, hours).
+    """
+    key, task_name, display_name, filtered_history, parsed_periods, target_status = args
+    rows: List[Tuple[str, str, str, Any, Any, float]] = []
+    try:
+        # Историю разбираем один раз, периоды ходят по готовым массивам
+        timestamps, status_codes, status_ids = build_events(filtered_history)
+        logger.debug("Найденные статусы в истории: %s", set(status_ids))
+
+        for start_str, end_str, period_start, period_end in parsed_periods:
+            mins = time_in_status(
+                timestamps, status_codes, status_ids,
+                period_start, period_end, target_status
+            )
+            hours = round(mins / 60, 1)
+
+            logger.debug("Задача %s, период %s-%s: %s часов", key, start_str, end_str, hours)
+
+            if hours > 0:
+                rows.append((start_str, end_str, display_name, key, task_name, hours))
+
+        logger.debug("История обработана для key=%s", key)
+    except Exception as e:
+        logger.warning("Ошибка при обработке истории key=%s: %s", key, e)
+    return rows
+
 def save_to_excel_multi(
     grouped_by_period: Dict[Tuple[str, str], Dict[str, List[List[Any]]]], 
-    filepath: str
+    filepath: Union[str, io.BytesIO]
 ) -> None:
     """Сохраняет данные в Excel файл с несколькими листами (по периоду на лист)"""
-    workbook = xlsxwriter.Workbook(filepath)
-    
+    # constant_memory: строки сбрасываются на диск по мере записи,
+    # память не растет с размером отчета
+    workbook = xlsxwriter.Workbook(
+        filepath, {"constant_memory": True, "strings_to_numbers": False}
+    )
+
     for (start_str, end_str), grouped_data in grouped_by_period.items():
         sheet_name = f"{start_str}_{end_str}"
         if len(sheet_name) > 31:
             sheet_name = sheet_name[:31]
-        
+
         worksheet = workbook.add_worksheet(sheet_name)
-        
+
+        # Локальные ссылки на методы: без LOAD_ATTR на каждую ячейку
+        ws_str = worksheet.write_string
+        ws_num = worksheet.write_number
+        ws_merge = worksheet.merge_range
+
         headers = ["Display Name", "Task Key", "Task Name", "In Progress Hours", "Days", "Tasks Count"]
         for col_num, header in enumerate(headers):
-            worksheet.write(0, col_num, header)
+            ws_str(0, col_num, header)
         
         row = 1
         for display_name, tasks in grouped_data.items():
@@ -213,25 +393,230 @@ def save_to_excel_multi(
             total_days = round(total_hours / 8, 1)
             tasks_count = len(tasks)
             
+            # merge_range допустим и в constant_memory-режиме: все строки
+            # группы записываются до перехода к следующей (еще не сброшены)
             if len(tasks) > 1:
-                worksheet.merge_range(row, 0, row + len(tasks) - 1, 0, display_name)
-                worksheet.merge_range(row, 4, row + len(tasks) - 1, 4, total_days)
-                worksheet.merge_range(row, 5, row + len(tasks) - 1, 5, tasks_count)
+                ws_merge(row, 0, row + len(tasks) - 1, 0, display_name)
+                ws_merge(row, 4, row + len(tasks) - 1, 4, total_days)
+                ws_merge(row, 5, row + len(tasks) - 1, 5, tasks_count)
             else:
-                worksheet.write(row, 0, display_name)
-                worksheet.write(row, 4, total_days)
-                worksheet.write(row, 5, tasks_count)
-            
+                ws_str(row, 0, str(display_name))
+                ws_num(row, 4, total_days)
+                ws_num(row, 5, tasks_count)
+
             for i, task in enumerate(tasks):
                 task_key, task_name, hours = task
                 display_hours = display_hours_list[i]
-                worksheet.write(row, 1, task_key)
-                worksheet.write(row, 2, task_name)
-                worksheet.write(row, 3, display_hours)
+                # write_string принимает только str, а key/name могут быть
+                # числами (числовые id задач, произвольный JSON клиента)
+                ws_str(row, 1, str(task_key))
+                ws_str(row, 2, str(task_name))
+                ws_num(row, 3, display_hours)
                 row += 1
     
     workbook.close()
 
+def save_to_excel_multi_openpyxl(
+    grouped_by_period: Dict[Tuple[str, str], Dict[str, List[List[Any]]]],
+    filepath: Union[str, io.BytesIO]
+) -> None:
+    """
+    Быстрый бэкенд для очень больших отчетов: openpyxl в write-only режиме
+    сериализует целые строки через ws.append, минуя поячеечное API.
+    Объединение ячеек не поддерживается — имя/итоги повторяются в каждой строке.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+
+    headers = ["Display Name", "Task Key", "Task Name", "In Progress Hours", "Days", "Tasks Count"]
+
+    for (start_str, end_str), grouped_data in grouped_by_period.items():
+        sheet_name = f"{start_str}_{end_str}"
+        if len(sheet_name) > 31:
+            sheet_name = sheet_name[:31]
+
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(headers)
+
+        for display_name, tasks in grouped_data.items():
+            tasks = [t for t in tasks if t[2] > 0]
+            if not tasks:
+                continue
+
+            tasks = sorted(tasks, key=lambda x: x[0])
+
+            # Корректируем отображение часов для задачи: <1 часа → 1
+            display_hours_list = [task[2] if task[2] >= 1 else 1 for task in tasks]
+            total_hours = sum(display_hours_list)
+            total_days = round(total_hours / 8, 1)
+            tasks_count = len(tasks)
+
+            for i, task in enumerate(tasks):
+                task_key, task_name, hours = task
+                worksheet.append(
+                    (display_name, task_key, task_name, display_hours_list[i], total_days, tasks_count)
+                )
+
+    workbook.save(filepath)
+
+# === Прямая генерация xlsx-XML для самых больших отчетов ===
+# xlsx — это zip с XML внутри; для 10^5+ строк дешевле собрать XML строками,
+# чем гонять поячеечные API xlsxwriter/openpyxl.
+
+# Начиная со скольких строк process_data переключается на raw-XML бэкенд
+RAWXML_ROW_THRESHOLD = 50_000
+
+_XML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+_RAWXML_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+_RAWXML_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font/></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    "</styleSheet>"
+)
+
+def save_to_excel_multi_rawxml(
+    grouped_by_period: Dict[Tuple[str, str], Dict[str, List[List[Any]]]],
+    filepath: Union[str, io.BytesIO]
+) -> None:
+    """
+    Собирает xlsx напрямую: XML листов пишется потоково в zip-архив
+    (компрессия уровня 1 — скорость важнее размера). Раскладка строк
+    как у openpyxl-бэкенда: без объединения ячеек.
+    """
+    esc = _XML_ESCAPE_TABLE
+    cols = "ABCDEF"
+
+    sheet_names = []
+    for start_str, end_str in grouped_by_period:
+        sheet_name = f"{start_str}_{end_str}"
+        if len(sheet_name) > 31:
+            sheet_name = sheet_name[:31]
+        sheet_names.append(sheet_name)
+
+    with zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(len(sheet_names))
+        )
+        zf.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f"{overrides}</Types>",
+        )
+        zf.writestr("_rels/.rels", _RAWXML_RELS)
+        zf.writestr("xl/styles.xml", _RAWXML_STYLES)
+
+        sheets_xml = "".join(
+            f'<sheet name="{name.translate(esc)}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+            for i, name in enumerate(sheet_names)
+        )
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f"<sheets>{sheets_xml}</sheets></workbook>",
+        )
+
+        sheet_rels = "".join(
+            f'<Relationship Id="rId{i + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i + 1}.xml"/>'
+            for i in range(len(sheet_names))
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f"{sheet_rels}"
+            f'<Relationship Id="rId{len(sheet_names) + 1}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'
+            "</Relationships>",
+        )
+
+        headers = ["Display Name", "Task Key", "Task Name", "In Progress Hours", "Days", "Tasks Count"]
+        header_row = "<row r=\"1\">" + "".join(
+            f'<c r="{cols[j]}1" t="inlineStr"><is><t>{h}</t></is></c>'
+            for j, h in enumerate(headers)
+        ) + "</row>"
+
+        for sheet_idx, ((start_str, end_str), grouped_data) in enumerate(grouped_by_period.items()):
+            with zf.open(f"xl/worksheets/sheet{sheet_idx + 1}.xml", "w") as member:
+                member.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                member.write(header_row.encode("utf-8"))
+
+                r = 2
+                for display_name, tasks in grouped_data.items():
+                    tasks = [t for t in tasks if t[2] > 0]
+                    if not tasks:
+                        continue
+
+                    tasks = sorted(tasks, key=lambda x: x[0])
+
+                    # Корректируем отображение часов для задачи: <1 часа → 1
+                    display_hours_list = [task[2] if task[2] >= 1 else 1 for task in tasks]
+                    total_hours = sum(display_hours_list)
+                    total_days = round(total_hours / 8, 1)
+                    tasks_count = len(tasks)
+
+                    name_esc = str(display_name).translate(esc)
+                    for i, task in enumerate(tasks):
+                        task_key, task_name, hours = task
+                        member.write(
+                            (
+                                f'<row r="{r}">'
+                                f'<c r="A{r}" t="inlineStr"><is><t>{name_esc}</t></is></c>'
+                                f'<c r="B{r}" t="inlineStr"><is><t>{str(task_key).translate(esc)}</t></is></c>'
+                                f'<c r="C{r}" t="inlineStr"><is><t>{str(task_name).translate(esc)}</t></is></c>'
+                                f'<c r="D{r}"><v>{display_hours_list[i]}</v></c>'
+                                f'<c r="E{r}"><v>{total_days}</v></c>'
+                                f'<c r="F{r}"><v>{tasks_count}</v></c>'
+                                "</row>"
+                            ).encode("utf-8")
+                        )
+                        r += 1
+
+                member.write(b"</sheetData></worksheet>")
+
+# Кэш рабочих эндпоинтов TeamStorm: какой из кандидатов ответил успешно.
+# После «прогрева» пробный перебор мертвых URL не повторяется.
+_endpoint_cache: Dict[str, str] = {}
+
+# Негативный кэш: URL → время, до которого его не стоит пробовать снова.
+# Вместе с позитивным кэшем выше устоявшийся трафик — один запрос на вызов.
+_bad_endpoints: Dict[str, float] = {}
+NEGATIVE_CACHE_TTL = 300  # секунд
+
+def _endpoint_recently_failed(url: str) -> bool:
+    return _bad_endpoints.get(url, 0) > time.time()
+
+def _mark_endpoint_failed(url: str, status_code: int) -> None:
+    """Запоминаем только «эндпоинта нет» (404/405). 401/403 — проблема
+    куки, а не URL: после исправления куки перебор должен заработать сразу."""
+    if status_code in (404, 405):
+        _bad_endpoints[url] = time.time() + NEGATIVE_CACHE_TTL
+
 # === API Endpoints ===
 @app.get("/")
 async def root():
@@ -257,21 +642,25 @@ async def get_workspaces(session_cookie: str):
         for user_endpoint in user_info_endpoints:
             try:
                 user_url = f"{base_url}{user_endpoint}"
+                if _endpoint_recently_failed(user_url):
+                    continue
                 headers = {"Accept": "application/json"}
-                user_resp = requests.get(user_url, cookies=cookies, headers=headers, timeout=5)
+                user_resp = SESSION.get(user_url, cookies=cookies, headers=headers, timeout=5)
                 if user_resp.status_code == 200:
                     try:
                         user_data = user_resp.json()
-                        print(f"Пользователь аутентифицирован: {user_data}")
+                        logger.debug("Пользователь аутентифицирован: %s", user_data)
                         user_authenticated = True
                         break
                     except:
                         pass
+                else:
+                    _mark_endpoint_failed(user_url, user_resp.status_code)
             except:
                 pass
         
         if not user_authenticated:
-            print("Предупреждение: не удалось подтвердить аутентификацию пользователя")
+            logger.warning("Не удалось подтвердить аутентификацию пользователя")
         
         # Пробуем разные возможные эндпоинты для получения workspace
         possible_endpoints = [
@@ -283,38 +672,48 @@ async def get_workspaces(session_cookie: str):
             "/api/v1/workspace",
             "/api/workspace",
         ]
-        
+
+        # Уже известный рабочий эндпоинт пробуем первым
+        cached_endpoint = _endpoint_cache.get("workspaces")
+        if cached_endpoint:
+            possible_endpoints = [cached_endpoint] + [
+                e for e in possible_endpoints if e != cached_endpoint
+            ]
+
         for endpoint in possible_endpoints:
             try:
                 url = f"{base_url}{endpoint}"
-                print(f"Попытка получить workspace из: {url}")
-                
+                if _endpoint_recently_failed(url):
+                    logger.debug("Пропускаем недавно отказавший эндпоинт: %s", url)
+                    continue
+                logger.debug("Попытка получить workspace из: %s", url)
+
                 # Добавляем заголовки для правильной работы с API
                 headers = {
                     "Accept": "application/json",
                     "Content-Type": "application/json",
                 }
                 
-                resp = requests.get(url, cookies=cookies, headers=headers, timeout=10)
-                print(f"Статус ответа: {resp.status_code}")
-                print(f"Content-Type: {resp.headers.get('Content-Type', 'не указан')}")
-                print(f"Первые 200 символов ответа: {resp.text[:200]}")
+                resp = SESSION.get(url, cookies=cookies, headers=headers, timeout=10)
+                logger.debug("Статус ответа: %s", resp.status_code)
+                logger.debug("Content-Type: %s", resp.headers.get('Content-Type', 'не указан'))
+                logger.debug("Первые 200 символов ответа: %s", resp.text[:200])
                 
                 if resp.status_code == 200:
                     # Проверяем, что ответ действительно JSON
                     content_type = resp.headers.get('Content-Type', '').lower()
                     if 'application/json' not in content_type and 'text/json' not in content_type:
-                        print(f"Ответ не JSON, Content-Type: {content_type}")
+                        logger.debug("Ответ не JSON, Content-Type: %s", content_type)
                         # Пробуем все равно распарсить, может быть JSON без правильного заголовка
                         if not resp.text.strip() or resp.text.strip().startswith('<'):
-                            print(f"Ответ пустой или HTML, пропускаем {endpoint}")
+                            logger.debug("Ответ пустой или HTML, пропускаем %s", endpoint)
                             continue
                     
                     try:
-                        data = resp.json()
-                        print(f"Получены данные: {type(data)}, ключи: {list(data.keys()) if isinstance(data, dict) else 'list'}")
-                    except json.JSONDecodeError as je:
-                        print(f"Ошибка парсинга JSON: {je}, текст ответа: {resp.text[:500]}")
+                        data = orjson.loads(resp.content)
+                        logger.debug("Получены данные: %s, ключи: %s", type(data), list(data.keys()) if isinstance(data, dict) else 'list')
+                    except (orjson.JSONDecodeError, json.JSONDecodeError) as je:
+                        logger.warning("Ошибка парсинга JSON: %s, текст ответа: %s", je, resp.text[:500])
                         continue
                     
                     # Обрабатываем разные форматы ответа
@@ -342,17 +741,17 @@ async def get_workspaces(session_cookie: str):
                             })
                     
                     if result:
-                        print(f"Найдено workspace: {len(result)}")
+                        _endpoint_cache["workspaces"] = endpoint
+                        logger.info("Найдено workspace: %s", len(result))
                         return {"workspaces": result}
                 else:
-                    print(f"Ошибка {resp.status_code}: {resp.text[:200]}")
+                    _mark_endpoint_failed(url, resp.status_code)
+                    logger.debug("Ошибка %s: %s", resp.status_code, resp.text[:200])
             except requests.RequestException as e:
-                print(f"Ошибка запроса к {endpoint}: {e}")
+                logger.warning("Ошибка запроса к %s: %s", endpoint, e)
                 continue
-            except Exception as e:
-                print(f"Неожиданная ошибка при обработке {endpoint}: {e}")
-                import traceback
-                print(traceback.format_exc())
+            except Exception:
+                logger.exception("Неожиданная ошибка при обработке %s", endpoint)
                 continue
         
         # Если ни один эндпоинт не сработал, возвращаем более информативную ошибку
@@ -367,9 +766,7 @@ async def get_workspaces(session_cookie: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Критическая ошибка при получении workspace: {e}")
-        import traceback
-        print(traceback.format_exc())
+        logger.exception("Критическая ошибка при получении workspace: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"Внутренняя ошибка при получении списка проектов: {str(e)}"
@@ -384,29 +781,40 @@ async def get_workitems(workspace_id: str, session_cookie: str):
     cookies = {"session": session_cookie}
     
     try:
-        # Пробуем разные возможные эндпоинты
+        # Пробуем разные возможные эндпоинты (шаблоны — рабочий вариант
+        # кэшируется один раз для всех workspace)
         possible_endpoints = [
-            f"/api/v1/workspaces/{workspace_id}/workItems",
-            f"/api/workspaces/{workspace_id}/workItems",
-            f"/api/v1/workspaces/{workspace_id}/items",
-            f"/api/workspaces/{workspace_id}/items",
-            f"/rest/api/1.0/workspaces/{workspace_id}/workItems",
-            f"/rest/api/workspaces/{workspace_id}/workItems",
+            "/api/v1/workspaces/{workspace_id}/workItems",
+            "/api/workspaces/{workspace_id}/workItems",
+            "/api/v1/workspaces/{workspace_id}/items",
+            "/api/workspaces/{workspace_id}/items",
+            "/rest/api/1.0/workspaces/{workspace_id}/workItems",
+            "/rest/api/workspaces/{workspace_id}/workItems",
         ]
-        
+
+        # Уже известный рабочий эндпоинт пробуем первым
+        cached_endpoint = _endpoint_cache.get("workitems")
+        if cached_endpoint:
+            possible_endpoints = [cached_endpoint] + [
+                e for e in possible_endpoints if e != cached_endpoint
+            ]
+
         all_items = []
-        
+
         for endpoint in possible_endpoints:
             try:
-                url = f"{base_url}{endpoint}"
-                print(f"Попытка получить workitems из: {url}")
-                resp = requests.get(url, cookies=cookies, timeout=30)
-                print(f"Статус ответа: {resp.status_code}")
+                url = f"{base_url}{endpoint.format(workspace_id=workspace_id)}"
+                if _endpoint_recently_failed(url):
+                    logger.debug("Пропускаем недавно отказавший эндпоинт: %s", url)
+                    continue
+                logger.debug("Попытка получить workitems из: %s", url)
+                resp = SESSION.get(url, cookies=cookies, timeout=30)
+                logger.debug("Статус ответа: %s", resp.status_code)
                 
                 if resp.status_code == 200:
-                    data = resp.json()
-                    print(f"Получены данные: {type(data)}, ключи: {list(data.keys()) if isinstance(data, dict) else 'list'}")
-                    
+                    data = orjson.loads(resp.content)
+                    logger.debug("Получены данные: %s, ключи: %s", type(data), list(data.keys()) if isinstance(data, dict) else 'list')
+
                     # Обрабатываем разные форматы ответа
                     if isinstance(data, list):
                         items = data
@@ -421,7 +829,7 @@ async def get_workitems(workspace_id: str, session_cookie: str):
                     else:
                         items = [data] if data else []
                     
-                    print(f"Найдено элементов: {len(items)}")
+                    logger.debug("Найдено элементов: %s", len(items))
                     
                     # Форматируем задачи
                     for item in items:
@@ -438,15 +846,17 @@ async def get_workitems(workspace_id: str, session_cookie: str):
                                 all_items.append(formatted_item)
                     
                     if all_items:
-                        print(f"Отформатировано задач: {len(all_items)}")
+                        _endpoint_cache["workitems"] = endpoint
+                        logger.info("Отформатировано задач: %s", len(all_items))
                         return {"items": all_items, "count": len(all_items)}
                 else:
-                    print(f"Ошибка {resp.status_code}: {resp.text[:200]}")
+                    _mark_endpoint_failed(url, resp.status_code)
+                    logger.debug("Ошибка %s: %s", resp.status_code, resp.text[:200])
             except requests.RequestException as e:
-                print(f"Ошибка при запросе {endpoint}: {e}")
+                logger.warning("Ошибка при запросе %s: %s", endpoint, e)
                 continue
             except Exception as e:
-                print(f"Неожиданная ошибка при обработке {endpoint}: {e}")
+                logger.warning("Неожиданная ошибка при обработке %s: %s", endpoint, e)
                 continue
         
         if not all_items:
@@ -456,95 +866,136 @@ async def get_workitems(workspace_id: str, session_cookie: str):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Ошибка при получении workitems: {e}")
+        logger.exception("Ошибка при получении workitems: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при получении задач: {str(e)}")
 
 @app.post("/api/process")
-async def process_data(request: ProcessRequest):
+async def process_data(request: ProcessRequest, fast: bool = False):
     """
-    Обрабатывает данные и генерирует Excel файл.
-    Возвращает путь к файлу для скачивания.
+    Обрабатывает данные и возвращает Excel файл прямо в ответе.
+
+    ?fast=true переключает на write-only бэкенд openpyxl
+    (быстрее на больших отчетах, но без объединения ячеек).
     """
     if not request.periods:
         raise HTTPException(status_code=400, detail="Список periods пуст.")
     
     base_url = f"{TEAMSTORM_BASE_URL}/history/api/v1"
-    grouped_by_period: Dict[Tuple[str, str], Dict[str, List[List[Any]]]] = {
-        (p.start, p.end): defaultdict(list) for p in request.periods
-    }
-    
+
+    # Границы периодов парсим один раз, а не на каждую пару (задача, период)
+    parsed_periods = [(p.start, p.end) + parse_period(p) for p in request.periods]
+
     cookies = {}
     if request.session_cookie:
         cookies = {"session": request.session_cookie}
-    
-    for item in request.items:
+
+    # Тянем все истории параллельно: запросы сетевые, поэтому выгоднее
+    # перекрыть их задержки, чем выполнять последовательно
+    sem = asyncio.Semaphore(HISTORY_FETCH_CONCURRENCY)
+
+    async def fetch_history(client: httpx.AsyncClient, item: Dict[str, Any]):
         key = item.get("key")
         workspace_id = item.get("workspaceId")
         workitem_id = item.get("workitemId")
-        
+
         if not key or not workspace_id or not workitem_id:
-            print(f"Пропущен элемент из-за отсутствия ключевых данных: {item}")
-            continue
-        
-        # Тянем историю один раз
+            logger.warning("Пропущен элемент из-за отсутствия ключевых данных: %s", item)
+            return None
+
         history_url = f"{base_url}/workspaces/{workspace_id}/workItems/{workitem_id}/history"
         try:
-            resp = requests.get(history_url, cookies=cookies)
+            async with sem:
+                resp = await client.get(history_url, cookies=cookies)
             resp.raise_for_status()
-            history_data = resp.json()
-            
-            # Только события смены статуса
-            filtered_history = [
-                {
-                    "date": entry.get("date"),
-                    "type": entry.get("type"),
-                    "data": entry.get("data"),
-                }
-                for entry in history_data
-                if entry.get("type") == "StatusUpdated"
-            ]
-            
-            # Данные задачи
-            assignee = item.get("assignee", {}) or {}
-            display_name = assignee.get("displayName", "Не указано")
-            task_name = item.get("name", "Не указано")
-            
-            # Для каждого периода считаем часы отдельно
-            status_to_search = request.status_name or "in progress"
-            print(f"Обработка задачи {key}, статус для поиска: '{status_to_search}'")
-            print(f"Количество событий в истории: {len(filtered_history)}")
-            
-            for period in request.periods:
-                mins = calculate_in_progress_time_for_period(
-                    filtered_history, period.start, period.end, status_to_search
-                )
-                hours = round(mins / 60, 1)
-                
-                print(f"Задача {key}, период {period.start}-{period.end}: {hours} часов")
-                
-                if hours > 0:
-                    grouped_by_period[(period.start, period.end)][display_name].append(
-                        [key, task_name, hours]
-                    )
-            
-            print(f"История обработана для key={key}")
-        except requests.RequestException as e:
-            print(f"Ошибка при запросе {history_url}: {e}")
+            return item, orjson.loads(resp.content)
+        except httpx.HTTPError as e:
+            logger.warning("Ошибка при запросе %s: %s", history_url, e)
+            return None
+        except (orjson.JSONDecodeError, json.JSONDecodeError) as e:
+            # 200 с не-JSON телом (например, редирект на логин) —
+            # пропускаем задачу, не роняя весь /api/process
+            logger.warning("Некорректный JSON истории от %s: %s", history_url, e)
+            return None
+
+    limits = httpx.Limits(max_connections=HISTORY_FETCH_CONCURRENCY)
+    # TeamStorm отвечает медленно: дефолтные 5 секунд httpx приводили бы
+    # к тихой потере задач из отчета. 30 секунд — как у запроса workitems.
+    timeout = httpx.Timeout(30.0)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=timeout) as client:
+        fetched = await asyncio.gather(
+            *(fetch_history(client, item) for item in request.items)
+        )
+
+    # Агрегация по периодам — после того как все истории получены.
+    # Сначала собираем независимые задания (по одному на задачу)
+    status_to_search = (request.status_name or "in progress").lower()
+    agg_args = []
+    for result in fetched:
+        if result is None:
             continue
+        item, history_data = result
+        key = item.get("key")
+
+        # Только события смены статуса; build_events читает date/data
+        # прямо из исходных записей, копировать их незачем
+        filtered_history = [
+            entry for entry in history_data
+            if entry.get("type") == "StatusUpdated"
+        ]
+
+        # Данные задачи
+        assignee = item.get("assignee", {}) or {}
+        display_name = assignee.get("displayName", "Не указано")
+        task_name = item.get("name", "Не указано")
+
+        logger.debug("Обработка задачи %s, статус для поиска: '%s'", key, status_to_search)
+        logger.debug("Количество событий в истории: %s", len(filtered_history))
+
+        agg_args.append(
+            (key, task_name, display_name, filtered_history, parsed_periods, status_to_search)
+        )
+
+    # CPU-часть раскидываем по ядрам; результаты копим плоским списком —
+    # без dict-поисков на каждую строку в горячем цикле
+    rows: List[Tuple[str, str, str, Any, Any, float]] = []
+    if agg_args:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            for item_rows in pool.map(_aggregate_item, agg_args, chunksize=8):
+                rows.extend(item_rows)
+
+    # Группируем один раз перед записью: сортировка + groupby
+    rows.sort(key=lambda r: (r[0], r[1], r[2], r[3]))
+    grouped_by_period: Dict[Tuple[str, str], Dict[str, List[List[Any]]]] = {
+        (p.start, p.end): defaultdict(list) for p in request.periods
+    }
+    for (start_str, end_str, display_name), group in groupby(rows, key=lambda r: (r[0], r[1], r[2])):
+        grouped_by_period[(start_str, end_str)][display_name] = [
+            [r[3], r[4], r[5]] for r in group
+        ]
     
-    # Создаем временный файл для Excel
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx")
-    temp_filepath = temp_file.name
-    temp_file.close()
-    
-    # Сохранение в Excel
-    save_to_excel_multi(grouped_by_period, temp_filepath)
-    
-    return {"filepath": temp_filepath, "filename": "report.xlsx"}
+    # Сохранение в Excel сразу в память (все бэкенды принимают file-like);
+    # совсем большие отчеты — через raw-XML бэкенд
+    buf = io.BytesIO()
+    if len(rows) > RAWXML_ROW_THRESHOLD:
+        save_to_excel_multi_rawxml(grouped_by_period, buf)
+    elif fast:
+        save_to_excel_multi_openpyxl(grouped_by_period, buf)
+    else:
+        save_to_excel_multi(grouped_by_period, buf)
+    buf.seek(0)
+
+    # Отдаем файл прямо в ответе: без второго запроса на скачивание
+    # и без временного файла на диске
+    return StreamingResponse(
+        buf,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": 'attachment; filename="report.xlsx"'},
+    )
 
 @app.get("/api/download/{filepath:path}")
 async def download_file(filepath: str, background_tasks: BackgroundTasks):
-    """Скачивание сгенерированного Excel файла"""
+    """Скачивание сгенерированного Excel файла (legacy: /api/process
+    теперь отдает файл сразу в ответе)"""
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail="Файл не найден")
     
@@ -569,10 +1020,10 @@ async def upload_json_file(file: UploadFile = File(...)):
     """Загрузка JSON файла с данными items"""
     try:
         content = await file.read()
-        data = json.loads(content.decode("utf-8"))
+        data = orjson.loads(content)
         items = data.get("items", [])
         return {"items": items, "count": len(items)}
-    except json.JSONDecodeError:
+    except (orjson.JSONDecodeError, json.JSONDecodeError):
         raise HTTPException(status_code=400, detail="Неверный формат JSON файла")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при обработке файла: {str(e)}")
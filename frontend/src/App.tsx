@@ -154,24 +154,23 @@ function App() {
     try {
       const finalStatusName = statusName === 'custom' ? customStatus : statusName
       
-      const response = await axios.post('http://localhost:8000/api/process', {
-        items,
-        periods: validPeriods,
-        session_cookie: sessionCookie || undefined,
-        status_name: finalStatusName,
-      })
-
-      // Скачиваем файл
-      const fileResponse = await axios.get(
-        `http://localhost:8000/api/download/${encodeURIComponent(response.data.filepath)}`,
+      // Файл приходит прямо в ответе — отдельный запрос на скачивание не нужен
+      const response = await axios.post(
+        'http://localhost:8000/api/process',
+        {
+          items,
+          periods: validPeriods,
+          session_cookie: sessionCookie || undefined,
+          status_name: finalStatusName,
+        },
         { responseType: 'blob' }
       )
 
       // Создаем ссылку для скачивания
-      const url = window.URL.createObjectURL(new Blob([fileResponse.data]))
+      const url = window.URL.createObjectURL(new Blob([response.data]))
       const link = document.createElement('a')
       link.href = url
-      link.setAttribute('download', response.data.filename || 'report.xlsx')
+      link.setAttribute('download', 'report.xlsx')
       document.body.appendChild(link)
       link.click()
       link.remove()
@@ -179,7 +178,19 @@ function App() {
 
       setSuccess('Excel файл успешно сгенерирован и скачан!')
     } catch (err: any) {
-      setError(err.response?.data?.detail || 'Ошибка при обработке данных')
+      // При responseType: 'blob' тело ошибки тоже приходит Blob'ом —
+      // читаем его как текст и достаем detail из JSON
+      let detail: string | undefined
+      if (err.response?.data instanceof Blob) {
+        try {
+          detail = JSON.parse(await err.response.data.text())?.detail
+        } catch {
+          // тело не JSON — показываем общее сообщение
+        }
+      } else {
+        detail = err.response?.data?.detail
+      }
+      setError(detail || 'Ошибка при обработке данных')
     } finally {
       setLoading(false)
     }